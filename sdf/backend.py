@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+# The array module SDFs are evaluated with. Set SDF_BACKEND=cupy to sample
+# the 3D primitives and operations on the GPU with CuPy instead of numpy.
+
+BACKEND = os.environ.get('SDF_BACKEND', 'numpy')
+
+if BACKEND == 'numpy':
+    xp = np
+
+    def asnumpy(a):
+        return np.asarray(a)
+
+elif BACKEND == 'cupy':
+    import cupy as xp
+
+    def asnumpy(a):
+        return xp.asnumpy(a)
+
+else:
+    raise ValueError('unknown SDF_BACKEND: %r' % BACKEND)
+
+def on_host(f):
+    # wrap a numpy-only f(p) so that it can be called with backend arrays
+    if xp is np:
+        return f
+
+    def g(p):
+        return xp.asarray(f(asnumpy(p)))
+
+    return g
+
+def on_device(f):
+    # wrap a backend f(p) so that it can be called with numpy arrays
+    if xp is np:
+        return f
+
+    def g(p):
+        return asnumpy(f(xp.asarray(p)))
+
+    return g
+
+def fuse(f):
+    # compile an elementwise f into a single kernel where the backend can
+    if xp is np:
+        return f
+    return xp.fuse()(f)
@@ -3,6 +3,7 @@ import numpy as np
 import operator
 
 from . import dn, d3, ease
+from . import backend as _backend
 
 # Constants
 
@@ -50,7 +51,7 @@ def op2(f):
 
 def op23(f):
     def wrapper(*args, **kwargs):
-        return d3.SDF3(f(*args, **kwargs))
+        return d3.SDF3(_backend.on_host(f(*args, **kwargs)))
     _ops[f.__name__] = wrapper
     return wrapper
 
@@ -182,9 +183,9 @@ def rectangle(size=1, center=ORIGIN, a=None, b=None):
         size = b - a
         center = a + size / 2
         return rectangle(size, center)
-    size = np.abs(np.array(size))
+    half = np.abs(np.array(size)) / 2
     def f(p):
-        q = np.abs(p - center) - size / 2
+        q = np.abs(p - center) - half
         return _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0)
     return f
 
@@ -200,7 +201,7 @@ def rounded_rectangle(size=1, radius=0.1, center=ORIGIN, a=None, b=None):
         r0, r1, r2, r3 = radius
     except TypeError:
         r0 = r1 = r2 = r3 = radius
-    size = np.abs(np.array(size))
+    half = np.abs(np.array(size)) / 2
     def f(p):
         x = p[:,0]
         y = p[:,1]
@@ -209,7 +210,7 @@ def rounded_rectangle(size=1, radius=0.1, center=ORIGIN, a=None, b=None):
         r[np.logical_and(x > 0, y <= 0)] = r1
         r[np.logical_and(x <= 0, y <= 0)] = r2
         r[np.logical_and(x <= 0, y > 0)] = r3
-        q = np.abs(p - center) - size / 2 + r
+        q = np.abs(p - center) - half + r
         return (
             _min(_max(q[:,0], q[:,1]), 0).reshape((-1, 1)) +
             _length(_max(q, 0)).reshape((-1, 1)) - r)
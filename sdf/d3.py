@@ -1,8 +1,18 @@
 import functools
+import inspect as _inspect
 import numpy as np
 import operator
 
+# the names from elsewhere that d3 uses are private, so that
+# "from sdf import *" brings in only the SDF API
+try:
+    import numexpr as _ne
+except ImportError:
+    _ne = None
+
 from . import dn, d2, ease, mesh
+from . import backend as _backend, kernels as _kernels
+from .backend import xp as _xp
 
 # Constants
 
@@ -18,13 +28,24 @@ UP = Z
 
 _ops = {}
 
+# points per block when evaluating large arrays of points, so that the
+# temporaries of each step stay in cache
+_CHUNK = 1 << 14
+
 
 class SDF3:
     def __init__(self, f):
         self.f = f
 
     def __call__(self, p):
-        return self.f(p).reshape((-1, 1))
+        if _xp is not np or len(p) <= _CHUNK:
+            return self.f(p).reshape((-1, 1))
+        d = self.f(p[:_CHUNK]).reshape(-1)
+        result = np.empty((len(p), 1), dtype=d.dtype)
+        result[:_CHUNK, 0] = d
+        for i in range(_CHUNK, len(p), _CHUNK):
+            result[i : i + _CHUNK, 0] = self.f(p[i : i + _CHUNK]).reshape(-1)
+        return result
 
     def __getattr__(self, name):
         if name in _ops:
@@ -45,6 +66,24 @@ class SDF3:
         self._k = k
         return self
 
+    def compile(self):
+        # an equivalent SDF that evaluates the whole tree with a single numba
+        # kernel, or this SDF if numba is unavailable or the tree uses
+        # something that can't be compiled (see jit.py)
+        compiled = self.__dict__.get("_compiled")
+        if compiled is None:
+            from . import jit
+
+            f = jit.compile(self)
+            if f is None:
+                compiled = self
+            else:
+                compiled = SDF3(f)
+                compiled._node = getattr(self, "_node", None)
+                compiled._k = getattr(self, "_k", None)
+            self._compiled = compiled
+        return compiled
+
     def generate(self, *args, **kwargs):
         return mesh.generate(self, *args, **kwargs)
 
@@ -55,16 +94,35 @@ class SDF3:
         return mesh.show_slice(self, *args, **kwargs)
 
 
+def _node(f):
+    # SDFs remember the factory and arguments they were made with, so that
+    # SDF3.compile can rebuild the tree
+    signature = _inspect.signature(f)
+
+    def make(wrapper, args, kwargs):
+        s = SDF3(f(*args, **kwargs))
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        s._node = (wrapper, bound.arguments)
+        return s
+
+    return make
+
+
 def sdf3(f):
+    make = _node(f)
+
     def wrapper(*args, **kwargs):
-        return SDF3(f(*args, **kwargs))
+        return make(wrapper, args, kwargs)
 
     return wrapper
 
 
 def op3(f):
+    make = _node(f)
+
     def wrapper(*args, **kwargs):
-        return SDF3(f(*args, **kwargs))
+        return make(wrapper, args, kwargs)
 
     _ops[f.__name__] = wrapper
     return wrapper
@@ -72,7 +130,7 @@ def op3(f):
 
 def op32(f):
     def wrapper(*args, **kwargs):
-        return d2.SDF2(f(*args, **kwargs))
+        return d2.SDF2(_backend.on_device(f(*args, **kwargs)))
 
     _ops[f.__name__] = wrapper
     return wrapper
@@ -82,19 +140,71 @@ def op32(f):
 
 
 def _length(a):
-    return np.linalg.norm(a, axis=1)
+    # row-wise contractions with einsum skip the a * a temporary
+    return _xp.sqrt(_xp.einsum("ij,ij->i", a, a))
+
+
+def _cast(a, p):
+    # constant arrays take the dtype of the points, so that float32 points
+    # are not promoted to float64 along the way
+    if p.dtype.kind == "f":
+        return a.astype(p.dtype, copy=False)
+    return a
 
 
 def _normalize(a):
     return a / np.linalg.norm(a)
 
 
+def _hypot(x, y):
+    # sqrt(x * x + y * y) without the overflow guards of np.hypot, which make
+    # it several times slower
+    return _xp.sqrt(x * x + y * y)
+
+
 def _dot(a, b):
-    return np.sum(a * b, axis=1)
+    return _xp.einsum("ij,ij->i", a, b)
+
+
+def _lerp(d1, d2, t):
+    # t * d2 + (1 - t) * d1 with a single new array. d1 and d2 are left
+    # alone, as an SDF may return an array it still holds on to
+    d = d2 - d1
+    d *= t
+    d += d1
+    return d
+
+
+def _columns(shape, count, dtype):
+    # an empty array of shape + (count,), column-major so that each of its
+    # columns can be written in place
+    return _xp.moveaxis(_xp.empty((count,) + shape, dtype=dtype), 0, -1)
 
 
 def _vec(*arrs):
-    return np.stack(arrs, axis=-1)
+    # same shape as np.stack(arrs, axis=-1), but column-major. Scalars are
+    # broadcast, so they need no array of their own
+    arrays = [a for a in arrs if hasattr(a, "shape")]
+    out = _columns(arrays[0].shape, len(arrs), _xp.result_type(*arrays))
+    for i, a in enumerate(arrs):
+        out[..., i] = a
+    return out
+
+
+def _rotate_xy(p, a):
+    # p rotated about the z axis by the angles a, computed into the columns
+    # of the result rather than through a temporary for each
+    x = p[:, 0]
+    y = p[:, 1]
+    c = _xp.cos(a)
+    s = _xp.sin(a)
+    q = _columns(x.shape, 3, _xp.result_type(c, p))
+    _xp.multiply(c, x, out=q[:, 0])
+    _xp.multiply(s, x, out=q[:, 1])
+    q[:, 0] -= _xp.multiply(s, y, out=s)
+    q[:, 1] += _xp.multiply(c, y, out=c)
+    q[:, 2] = p[:, 2]
+    return q
 
 
 def _perpendicular(v):
@@ -106,8 +216,181 @@ def _perpendicular(v):
     return np.cross(v, [1, 0, 0])
 
 
-_min = np.minimum
-_max = np.maximum
+def _rotation_matrix(angle, vector):
+    # the matrix that rotates row vectors by -angle around vector, so that
+    # p @ matrix samples the shape rotated by angle
+    x, y, z = _normalize(vector)
+    s = np.sin(angle)
+    c = np.cos(angle)
+    m = 1 - c
+    return np.array(
+        [
+            [m * x * x + c, m * x * y + z * s, m * z * x - y * s],
+            [m * x * y - z * s, m * y * y + c, m * y * z + x * s],
+            [m * z * x + y * s, m * y * z - x * s, m * z * z + c],
+        ]
+    ).T
+
+
+def _mirror_matrix(axis):
+    # the matrix that reflects row vectors in the plane normal to axis
+    a = _normalize(np.array(axis))
+    flip = np.diag((1.0, 1.0, -1.0))
+    dot = np.dot(UP, a)
+    if (dot == 1) | (dot == -1):
+        return flip
+    # rotate to the Z axis, do the flip and rotate back
+    angle = np.arccos(dot)
+    v = np.cross(UP, a)
+    return _rotation_matrix(angle, v) @ flip @ _rotation_matrix(-angle, v)
+
+
+def _matrix(matrix):
+    # 3x3 transforms are applied as p @ matrix, which goes through a matrix
+    # multiply when the matrix is a contiguous float array
+    return _xp.ascontiguousarray(_xp.asarray(matrix, dtype=np.float64))
+
+
+def _reflection(axis, center):
+    # the reflection in the plane through center normal to axis, with
+    # (p - center) @ matrix + center folded into p @ matrix + offset
+    matrix = _mirror_matrix(axis)
+    offset = _xp.asarray(center - np.asarray(center) @ matrix)
+    matrix = _matrix(matrix)
+
+    def f(p):
+        q = p @ _cast(matrix, p)
+        q += _cast(offset, p)
+        return q
+
+    return f
+
+
+# array module equivalents of the functions used in numexpr expressions
+_FUNCTIONS = {
+    name: getattr(_xp, name)
+    for name in ("abs", "sin", "cos", "sinh", "arctan2", "sqrt", "where")
+}
+
+
+@functools.lru_cache()
+def _compile(expr):
+    return compile(expr, "<sdf>", "eval")
+
+
+def _evaluate(expr, **names):
+    dtype = _xp.result_type(*[a for a in names.values() if hasattr(a, "dtype")])
+    if dtype.kind == "f":
+        for k, v in names.items():
+            if not hasattr(v, "dtype") or v.ndim == 0:
+                names[k] = dtype.type(v)
+    if _ne is not None and _xp is np:
+        return _ne.evaluate(expr, local_dict=names)
+    return eval(_compile(expr), _FUNCTIONS, names)
+
+
+def _box(p, center, half):
+    # the distance to the box given by center and half its size
+    q = _xp.abs(p - _cast(center, p)) - _cast(half, p)
+    return _evaluate(
+        "sqrt(where(qx > 0, qx, 0) ** 2 + where(qy > 0, qy, 0) ** 2"
+        " + where(qz > 0, qz, 0) ** 2) + where(qm < 0, qm, 0)",
+        qx=q[:, 0],
+        qy=q[:, 1],
+        qz=q[:, 2],
+        qm=_xp.amax(q, axis=1),
+    )
+
+
+# the surface expression and the box clip of _surface as one function, so
+# that a GPU backend evaluates a whole surface in a single fused kernel
+_FUSED = """
+def f(x, y, z, _cx, _cy, _cz, _hx, _hy, _hz, {names}):
+{lets}
+    _d = {expr}
+    _qx = abs(x - _cx) - _hx
+    _qy = abs(y - _cy) - _hy
+    _qz = abs(z - _cz) - _hz
+    _mx = where(_qx > 0, _qx, 0)
+    _my = where(_qy > 0, _qy, 0)
+    _mz = where(_qz > 0, _qz, 0)
+    _qm = where(_qx > _qy, _qx, _qy)
+    _qm = where(_qm > _qz, _qm, _qz)
+    _box = sqrt(_mx * _mx + _my * _my + _mz * _mz) + where(_qm < 0, _qm, 0)
+    return where(_d > _box, _d, _box)
+"""
+
+
+@functools.lru_cache()
+def _fused(expr, lets, names):
+    scope = dict(_FUNCTIONS)
+    lets = "\n".join("    %s = %s" % let for let in lets)
+    exec(_FUSED.format(expr=expr, lets=lets, names=", ".join(names)), scope)
+    return _backend.fuse(scope["f"])
+
+
+def _surface(expr, p, center, half, bound, lets=(), **names):
+    # evaluate expr of x, y, z and names, clipped to the box given by center
+    # and half its size. lets are (name, expr) pairs evaluated in turn beforehand, for
+    # terms that expr uses more than once. expr is at most bound, so it is
+    # only evaluated for points where the box distance is smaller than that.
+    x = p[:, 0]
+    y = p[:, 1]
+    z = p[:, 2]
+    if _xp is np:
+        box = _box(p, center, half)
+        near = box < bound
+        everywhere = near.all()
+        if not everywhere:
+            x, y, z = x[near], y[near], z[near]
+        names = dict(names, x=x, y=y, z=z)
+        for name, e in lets:
+            names[name] = _evaluate(e, **names)
+        d = _evaluate(expr, **names)
+        if everywhere:
+            return _evaluate("where(d > box, d, box)", d=d, box=box)
+        box[near] = _evaluate("where(d > box, d, box)", d=d, box=box[near])
+        return box
+    keys = tuple(sorted(names))
+    c = _xp.broadcast_to(_cast(center, p), (3,))
+    h = _xp.broadcast_to(_cast(half, p), (3,))
+    return _fused(expr, lets, keys)(
+        x, y, z, c[0], c[1], c[2], h[0], h[1], h[2], *[names[k] for k in keys]
+    )
+
+
+# lets for _surface
+_SINCOS = (
+    ("sx", "sin(x)"),
+    ("cx", "cos(x)"),
+    ("sy", "sin(y)"),
+    ("cy", "cos(y)"),
+    ("sz", "sin(z)"),
+    ("cz", "cos(z)"),
+)
+_DOUBLE = (
+    ("s2x", "2 * sx * cx"),
+    ("c2x", "cx * cx - sx * sx"),
+    ("s2y", "2 * sy * cy"),
+    ("c2y", "cy * cy - sy * sy"),
+    ("s2z", "2 * sz * cz"),
+    ("c2z", "cz * cz - sz * sz"),
+)
+_COS = (("cx", "cos(x)"), ("cy", "cos(y)"), ("cz", "cos(z)"))
+_POLAR = (("rho", "sqrt(x**2 + y**2)"), ("theta", "arctan2(y, x)"))
+# some of the cylindrical surfaces measure theta from the y axis
+_POLAR_Y = (("rho", "sqrt(x**2 + y**2)"), ("theta", "arctan2(x, y)"))
+_CYLINDRICAL_SINCOS = _POLAR_Y + (
+    ("sr", "sin(rho)"),
+    ("cr", "cos(rho)"),
+    ("st", "sin(theta)"),
+    ("ct", "cos(theta)"),
+    ("sz", "sin(z)"),
+    ("cz", "cos(z)"),
+)
+
+_min = _xp.minimum
+_max = _xp.maximum
 
 # Primitives
 
@@ -120,28 +403,33 @@ def sphere(radius=1, center=ORIGIN):
         radius (int, optional): measure. Defaults to 1.
         center (tuple, optional): origin. Defaults to ORIGIN.
     """
+    center = _xp.asarray(center)
+
     def f(p):
-        return _length(p - center) - radius
+        return _length(p - _cast(center, p)) - radius
 
     return f
 
+
 @sdf3
 def plane(normal=UP, point=ORIGIN):
     """Plane
-    
+
     An infinite plane, with the positive side being inside and the negative side being outside.
 
     Args:
         normal (tuple, optional): vector. Defaults to UP.
         point (tuple, optional): origin. Defaults to ORIGIN.
     """
-    normal = _normalize(normal)
+    normal = _xp.asarray(_normalize(normal))
+    point = _xp.asarray(point)
 
     def f(p):
-        return np.dot(point - p, normal)
+        return _xp.dot(_cast(point, p) - p, _cast(normal, p))
 
     return f
 
+
 @sdf3
 def slab(x0=None, y0=None, z0=None, x1=None, y1=None, z1=None, k=None):
     """Slab
@@ -157,6 +445,38 @@ def slab(x0=None, y0=None, z0=None, x1=None, y1=None, z1=None, k=None):
         z1 (float, optional): plane limit. Defaults to None.
         k (float, optional): amount of smoothing to apply. Defaults to None.
     """
+    if all(v is None for v in (x0, y0, z0, x1, y1, z1)):
+        raise ValueError("slab needs at least one plane limit")
+    if k is None:
+        # the distance to a box with some of its faces at infinity
+        bounds = [
+            (i, a, b)
+            for i, (a, b) in enumerate(((x0, x1), (y0, y1), (z0, z1)))
+            if a is not None or b is not None
+        ]
+        lo = np.array([-np.inf if v is None else v for v in (x0, y0, z0)])
+        hi = np.array([np.inf if v is None else v for v in (x1, y1, z1)])
+
+        def f(p):
+            if _kernels.ENABLED:
+                return _kernels.slab(p, lo, hi)
+            # the axes without bounds drop out
+            qs = []
+            for i, a, b in bounds:
+                x = p[:, i]
+                if b is None:
+                    qs.append(a - x)
+                elif a is None:
+                    qs.append(x - b)
+                else:
+                    qs.append(_max(a - x, x - b))
+            if len(qs) == 1:
+                return qs[0]
+            inside = functools.reduce(_max, qs)
+            outside = sum(q * q for q in (_max(q, 0) for q in qs))
+            return _xp.sqrt(outside) + _min(inside, 0)
+
+        return f
     fs = []
     if x0 is not None:
         fs.append(plane(X, (x0, 0, 0)))
@@ -191,14 +511,18 @@ def box(size=1, center=ORIGIN, a=None, b=None):
         size = b - a
         center = a + size / 2
         return box(size, center)
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
 
     def f(p):
-        q = np.abs(p - center) - size / 2
-        return _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0)
+        if _kernels.ENABLED:
+            return _kernels.box(p, half, center)
+        q = _xp.abs(p - _cast(center, p)) - _cast(half, p)
+        return _length(_max(q, 0)) + _min(_xp.amax(q, axis=1), 0)
 
     return f
 
+
 @sdf3
 def rounded_box(size, radius, center=ORIGIN):
     """Rounded Box
@@ -208,26 +532,33 @@ def rounded_box(size, radius, center=ORIGIN):
         radius (float): radius of curvature
         center (tuple, optional): origin. Defaults to ORIGIN.
     """
-    size = np.array(size)
+    # half the size of the box the rounded one is the dilation of
+    half = _xp.array(size) / 2 - radius
+    center = _xp.asarray(center)
 
     def f(p):
-        q = np.abs(p - center) - size / 2 + radius
-        return _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0) - radius
+        if _kernels.ENABLED:
+            return _kernels.box(p, half, center, radius)
+        q = _xp.abs(p - _cast(center, p)) - _cast(half, p)
+        return _length(_max(q, 0)) + _min(_xp.amax(q, axis=1), 0) - radius
 
     return f
 
 
 @sdf3
 def wireframe_box(size, thickness, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2 + thickness / 2
+    center = _xp.asarray(center)
 
     def g(a, b, c):
         return _length(_max(_vec(a, b, c), 0)) + _min(_max(a, _max(b, c)), 0)
 
     def f(p):
-        p = p - center
-        p = np.abs(p) - size / 2 - thickness / 2
-        q = np.abs(p + thickness / 2) - thickness / 2
+        if _kernels.ENABLED:
+            return _kernels.wireframe_box(p, half, thickness, center)
+        p = p - _cast(center, p)
+        p = _xp.abs(p) - _cast(half, p)
+        q = _xp.abs(p + thickness / 2) - thickness / 2
         px, py, pz = p[:, 0], p[:, 1], p[:, 2]
         qx, qy, qz = q[:, 0], q[:, 1], q[:, 2]
         return _min(_min(g(px, qy, qz), g(qx, py, qz)), g(qx, qy, pz))
@@ -238,25 +569,24 @@ def wireframe_box(size, thickness, center=ORIGIN):
 @sdf3
 def torus(r1, r2):
     def f(p):
-        xy = p[:, [0, 1]]
-        z = p[:, 2]
-        a = _length(xy) - r1
-        b = _length(_vec(a, z)) - r2
-        return b
+        a = _hypot(p[:, 0], p[:, 1]) - r1
+        return _hypot(a, p[:, 2]) - r2
 
     return f
 
 
 @sdf3
 def capsule(a, b, radius):
-    a = np.array(a)
-    b = np.array(b)
+    a = _xp.array(a)
+    b = _xp.array(b)
+    ba = b - a
+    inv_baba = 1 / float(_xp.dot(ba, ba))
 
     def f(p):
-        pa = p - a
-        ba = b - a
-        h = np.clip(np.dot(pa, ba) / np.dot(ba, ba), 0, 1).reshape((-1, 1))
-        return _length(pa - np.multiply(ba, h)) - radius
+        pa = p - _cast(a, p)
+        u = _cast(ba, p)
+        h = _xp.clip(_xp.dot(pa, u) * inv_baba, 0, 1).reshape((-1, 1))
+        return _length(pa - _xp.multiply(u, h)) - radius
 
     return f
 
@@ -264,33 +594,37 @@ def capsule(a, b, radius):
 @sdf3
 def cylinder(radius):
     def f(p):
-        return _length(p[:, [0, 1]]) - radius
+        return _hypot(p[:, 0], p[:, 1]) - radius
 
     return f
 
 
 @sdf3
 def capped_cylinder(a, b, radius):
-    a = np.array(a)
-    b = np.array(b)
+    a = _xp.array(a)
+    b = _xp.array(b)
+    ba = b - a
+    baba = float(_xp.dot(ba, ba))
+    inv_baba = 1 / baba
 
     def f(p):
-        ba = b - a
-        pa = p - a
-        baba = np.dot(ba, ba)
-        paba = np.dot(pa, ba).reshape((-1, 1))
-        x = _length(pa * baba - ba * paba) - radius * baba
-        y = np.abs(paba - baba * 0.5) - baba * 0.5
+        if _kernels.ENABLED:
+            return _kernels.capped_cylinder(p, a, ba, radius)
+        u = _cast(ba, p)
+        pa = p - _cast(a, p)
+        paba = _xp.dot(pa, u).reshape((-1, 1))
+        x = _length(pa * baba - u * paba) - radius * baba
+        y = _xp.abs(paba - baba * 0.5) - baba * 0.5
         x = x.reshape((-1, 1))
         y = y.reshape((-1, 1))
         x2 = x * x
         y2 = y * y * baba
-        d = np.where(
+        d = _xp.where(
             _max(x, y) < 0,
             -_min(x2, y2),
-            np.where(x > 0, x2, 0) + np.where(y > 0, y2, 0),
+            _xp.where(x > 0, x2, 0) + _xp.where(y > 0, y2, 0),
         )
-        return np.sign(d) * np.sqrt(np.abs(d)) / baba
+        return _xp.sign(d) * _xp.sqrt(_xp.abs(d)) * inv_baba
 
     return f
 
@@ -301,7 +635,7 @@ def rounded_cylinder(a, b, ra, rb):
     z = (a + b) / 2
 
     def f(p):
-        d = _vec(_length(p[:, [0, 1]]) - ra + rb, np.abs(p[:, 2] - z) - h / 2 + rb)
+        d = _vec(_hypot(p[:, 0], p[:, 1]) - ra + rb, _xp.abs(p[:, 2] - z) - h / 2 + rb)
         return _min(_max(d[:, 0], d[:, 1]), 0) + _length(_max(d, 0)) - rb
 
     return f
@@ -309,23 +643,28 @@ def rounded_cylinder(a, b, ra, rb):
 
 @sdf3
 def capped_cone(a, b, ra, rb):
-    a = np.array(a)
-    b = np.array(b)
+    a = _xp.array(a)
+    b = _xp.array(b)
+    ba = b - a
+    baba = float(_xp.dot(ba, ba))
+    inv_baba = 1 / baba
+    rba = rb - ra
+    inv_k = 1 / (rba * rba + baba)
 
     def f(p):
-        rba = rb - ra
-        baba = np.dot(b - a, b - a)
-        papa = _dot(p - a, p - a)
-        paba = np.dot(p - a, b - a) / baba
-        x = np.sqrt(papa - paba * paba * baba)
-        cax = _max(0, x - np.where(paba < 0.5, ra, rb))
-        cay = np.abs(paba - 0.5) - 0.5
-        k = rba * rba + baba
-        f = np.clip((rba * (x - ra) + paba * baba) / k, 0, 1)
+        if _kernels.ENABLED:
+            return _kernels.capped_cone(p, a, ba, ra, rb)
+        pa = p - _cast(a, p)
+        papa = _dot(pa, pa)
+        paba = _xp.dot(pa, _cast(ba, p)) * inv_baba
+        x = _xp.sqrt(papa - paba * paba * baba)
+        cax = _max(0, x - _xp.where(paba < 0.5, ra, rb).astype(x.dtype))
+        cay = _xp.abs(paba - 0.5) - 0.5
+        f = _xp.clip((rba * (x - ra) + paba * baba) * inv_k, 0, 1)
         cbx = x - ra - f * rba
         cby = paba - f
-        s = np.where(np.logical_and(cbx < 0, cay < 0), -1, 1)
-        return s * np.sqrt(
+        s = _xp.where(_xp.logical_and(cbx < 0, cay < 0), -1, 1).astype(x.dtype)
+        return s * _xp.sqrt(
             _min(cax * cax + cay * cay * baba, cbx * cbx + cby * cby * baba)
         )
 
@@ -335,25 +674,30 @@ def capped_cone(a, b, ra, rb):
 @sdf3
 def rounded_cone(r1, r2, h):
     def f(p):
-        q = _vec(_length(p[:, [0, 1]]), p[:, 2])
+        if _kernels.ENABLED:
+            return _kernels.rounded_cone(p, r1, r2, h)
+        q = _vec(_hypot(p[:, 0], p[:, 1]), p[:, 2])
         b = (r1 - r2) / h
-        a = np.sqrt(1 - b * b)
-        k = np.dot(q, _vec(-b, a))
+        a = float(np.sqrt(1 - b * b))
+        k = _xp.dot(q, _cast(_xp.array((-b, a)), p))
         c1 = _length(q) - r1
-        c2 = _length(q - _vec(0, h)) - r2
-        c3 = np.dot(q, _vec(a, b)) - r1
-        return np.where(k < 0, c1, np.where(k > a * h, c2, c3))
+        c2 = _length(q - _cast(_xp.array((0, h)), p)) - r2
+        c3 = _xp.dot(q, _cast(_xp.array((a, b)), p)) - r1
+        return _xp.where(k < 0, c1, _xp.where(k > a * h, c2, c3))
 
     return f
 
 
 @sdf3
 def ellipsoid(size):
-    size = np.array(size)
+    inv = 1 / _xp.array(size)
+    inv2 = inv * inv
 
     def f(p):
-        k0 = _length(p / size)
-        k1 = _length(p / (size * size))
+        if _kernels.ENABLED:
+            return _kernels.ellipsoid(p, inv)
+        k0 = _length(p * _cast(inv, p))
+        k1 = _length(p * _cast(inv2, p))
         return k0 * (k0 - 1) / k1
 
     return f
@@ -362,22 +706,23 @@ def ellipsoid(size):
 @sdf3
 def pyramid(h):
     def f(p):
-        a = np.abs(p[:, [0, 1]]) - 0.5
-        w = a[:, 1] > a[:, 0]
-        a[w] = a[:, [1, 0]][w]
-        px = a[:, 0]
+        if _kernels.ENABLED:
+            return _kernels.pyramid(p, h)
+        ax = _xp.abs(p[:, 0]) - 0.5
+        ay = _xp.abs(p[:, 1]) - 0.5
+        px = _max(ax, ay)
         py = p[:, 2]
-        pz = a[:, 1]
+        pz = _min(ax, ay)
         m2 = h * h + 0.25
         qx = pz
         qy = h * py - 0.5 * px
         qz = h * px + 0.5 * py
         s = _max(-qx, 0)
-        t = np.clip((qy - 0.5 * pz) / (m2 + 0.25), 0, 1)
+        t = _xp.clip((qy - 0.5 * pz) / (m2 + 0.25), 0, 1)
         a = m2 * (qx + s) ** 2 + qy * qy
         b = m2 * (qx + 0.5 * t) ** 2 + (qy - m2 * t) ** 2
-        d2 = np.where(_min(qy, -qx * m2 - qy * 0.5) > 0, 0, _min(a, b))
-        return np.sqrt((d2 + qz * qz) / m2) * np.sign(_max(qz, -py))
+        d2 = _xp.where(_min(qy, -qx * m2 - qy * 0.5) > 0, 0, _min(a, b))
+        return _xp.sqrt((d2 + qz * qz) / m2) * _xp.sign(_max(qz, -py))
 
     return f
 
@@ -387,15 +732,20 @@ def pyramid(h):
 
 @sdf3
 def MO(h, slant, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 2 - h
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = np.abs(np.sin(z) + np.cos(x + slant * np.sin(y))) - h
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        return _surface(
+            "abs(sin(z) + cos(x + slant * sin(y))) - h",
+            p,
+            center,
+            half,
+            bound,
+            slant=slant,
+            h=h,
+        )
 
     return f
 
@@ -404,58 +754,71 @@ def MO(h, slant, size, center=ORIGIN):
 def cylindrical_MO(
     thickness, m, n, slant, mode="vertical", size=2 * np.pi, center=ORIGIN
 ):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 2 - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        rho = np.sqrt(x**2 + y**2)
-        theta = np.arctan2(y, x)
         if mode == "vertical":
-            d = (
-                np.abs(np.sin(z) + np.cos(m * theta + slant * np.sin(n * rho)))
-                - thickness
+            return _surface(
+                "abs(sin(z) + cos(m * theta + slant * sin(n * rho))) - thickness",
+                p,
+                center,
+                half,
+                bound,
+                _POLAR,
+                m=m,
+                n=n,
+                slant=slant,
+                thickness=thickness,
             )
         elif mode == "horizontal":
-            d = (
-                np.abs(np.sin(z) + np.cos(m * rho + slant * np.sin(n * theta)))
-                - thickness
+            return _surface(
+                "abs(sin(z) + cos(m * rho + slant * sin(n * theta))) - thickness",
+                p,
+                center,
+                half,
+                bound,
+                _POLAR,
+                m=m,
+                n=n,
+                slant=slant,
+                thickness=thickness,
             )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
 
 @sdf3
 def EB(h, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 2 - h
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = np.abs(np.cos(x) + np.cos(y) * np.cos(z)) - h
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        return _surface(
+            "abs(cos(x) + cos(y) * cos(z)) - h", p, center, half, bound, h=h
+        )
 
     return f
 
 
 @sdf3
 def cylindrical_EB(h, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 2 - h
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        rho = np.sqrt(x**2 + y**2)
-        theta = np.arctan2(x, y)
-        d = np.abs(np.cos(rho) + np.cos(theta) * np.cos(z)) - h
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        return _surface(
+            "abs(cos(rho) + cos(theta) * cos(z)) - h",
+            p,
+            center,
+            half,
+            bound,
+            _POLAR_Y,
+            h=h,
+        )
 
     return f
 
@@ -477,32 +840,43 @@ def cylindrical_EB(h, size, center=ORIGIN):
 
 @sdf3
 def schwarzP(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 3 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = np.abs(np.cos(x) + np.cos(y) + np.cos(z) - topology) - thickness
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        if _kernels.ENABLED:
+            return _kernels.schwarzP(p, thickness, topology, half, center)
+        return _surface(
+            "abs(cos(x) + cos(y) + cos(z) - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            topology=topology,
+            thickness=thickness,
+        )
 
     return f
 
 
 @sdf3
 def cylindrical_schwarzP(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 3 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        rho = np.sqrt(x**2 + y**2)
-        theta = np.arctan2(x, y)
-        d = np.abs(np.cos(rho) + np.cos(theta) + np.cos(z) - topology) - thickness
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        return _surface(
+            "abs(cos(rho) + cos(theta) + cos(z) - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            _POLAR_Y,
+            topology=topology,
+            thickness=thickness,
+        )
 
     return f
 
@@ -520,119 +894,116 @@ def cylindrical_schwarzP(thickness, topology, size, center=ORIGIN):
 #     return f
 @sdf3
 def schwarzD(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 3 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = (
-            np.abs(
-                np.sin(x) * np.sin(y) * np.sin(z)
-                + np.sin(x) * np.cos(y) * np.cos(z)
-                + np.cos(x) * np.sin(y) * np.cos(z)
-                - topology
-            )
-            - thickness
+        if _kernels.ENABLED:
+            return _kernels.schwarzD(p, thickness, topology, half, center)
+        return _surface(
+            "abs(sx * sy * sz + sx * cy * cz + cx * sy * cz" " - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            _SINCOS,
+            topology=topology,
+            thickness=thickness,
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
 
 @sdf3
 def cylindrical_schwarzD(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 3 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        rho = np.sqrt(x**2 + y**2)
-        theta = np.arctan2(x, y)
-        d = (
-            np.abs(
-                np.sin(rho) * np.sin(theta) * np.sin(z)
-                + np.sin(rho) * np.cos(theta) * np.cos(z)
-                + np.cos(rho) * np.sin(theta) * np.cos(z)
-                - topology
-            )
-            - thickness
+        return _surface(
+            "abs(sr * st * sz + sr * ct * cz + cr * st * cz" " - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            _CYLINDRICAL_SINCOS,
+            topology=topology,
+            thickness=thickness,
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
 
 @sdf3
 def fischer_koch(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 3 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = (
-            np.abs(
-                np.cos(2 * x) * np.sin(y) * np.cos(z)
-                + np.cos(2 * y) * np.cos(x) * np.sin(z)
-                + np.cos(y) * np.sin(x) * np.cos(2 * z)
-                - topology
-            )
-            - thickness
+        if _kernels.ENABLED:
+            return _kernels.fischer_koch(p, thickness, topology, half, center)
+        return _surface(
+            "abs(c2x * sy * cz + c2y * cx * sz + cy * sx * c2z"
+            " - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            _SINCOS + _DOUBLE,
+            topology=topology,
+            thickness=thickness,
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
 
 @sdf3
 def lidinoid(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 6 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = (
-            np.abs(
-                np.sin(2 * x) * np.cos(y) * np.sin(z)
-                + np.sin(2 * y) * np.cos(z) * np.sin(x)
-                + np.sin(2 * z) * np.cos(x) * np.sin(y)
-                - np.cos(2 * x) * np.cos(2 * y)
-                - np.cos(2 * y) * np.cos(2 * z)
-                - np.cos(2 * z) * np.cos(2 * x)
-                - topology
-            )
-            - thickness
+        if _kernels.ENABLED:
+            return _kernels.lidinoid(p, thickness, topology, half, center)
+        return _surface(
+            "abs(s2x * cy * sz + s2y * cz * sx + s2z * cx * sy"
+            " - c2x * c2y - c2y * c2z - c2z * c2x"
+            " - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            _SINCOS + _DOUBLE,
+            topology=topology,
+            thickness=thickness,
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
 
 @sdf3
 def neovius(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 13 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = (
-            np.abs(
-                3 * (np.cos(x) + np.cos(y) + np.cos(z))
-                + 4 * np.cos(x) * np.cos(y) * np.cos(z)
-                - topology
-            )
-            - thickness
+        if _kernels.ENABLED:
+            return _kernels.neovius(p, thickness, topology, half, center)
+        return _surface(
+            "abs(3 * (cx + cy + cz) + 4 * cx * cy * cz - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            _COS,
+            topology=topology,
+            thickness=thickness,
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
@@ -652,23 +1023,23 @@ def neovius(thickness, topology, size, center=ORIGIN):
 
 @sdf3
 def gyroid(thickness, topology, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 3 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        d = (
-            np.abs(
-                np.cos(x) * np.sin(y)
-                + np.cos(y) * np.sin(z)
-                + np.cos(z) * np.sin(x)
-                - topology
-            )
-            - thickness
+        if _kernels.ENABLED:
+            return _kernels.gyroid(p, thickness, topology, half, center)
+        return _surface(
+            "abs(cos(x) * sin(y) + cos(y) * sin(z) + cos(z) * sin(x)"
+            " - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            topology=topology,
+            thickness=thickness,
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
@@ -677,25 +1048,25 @@ def gyroid(thickness, topology, size, center=ORIGIN):
 def cylindrical_gyroid(
     thickness, topology, n, size=(2 * np.pi, 2 * np.pi, 2 * np.pi), center=ORIGIN
 ):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
+    bound = 3 + abs(topology) - thickness
 
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        rho = np.sqrt(x**2 + y**2)
-        theta = np.arctan2(y, x)
-        d = (
-            np.abs(
-                np.cos(n * rho) * np.sin(n * theta)
-                + np.cos(n * theta) * np.sin(n * z)
-                + np.cos(n * z) * np.sin(n * rho)
-                - topology
-            )
-            - thickness
+        return _surface(
+            "abs(cos(n * rho) * sin(n * theta)"
+            " + cos(n * theta) * sin(n * z)"
+            " + cos(n * z) * sin(n * rho)"
+            " - topology) - thickness",
+            p,
+            center,
+            half,
+            bound,
+            _POLAR,
+            n=n,
+            topology=topology,
+            thickness=thickness,
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
 
     return f
 
@@ -719,7 +1090,8 @@ def cylindrical_gyroid(
 def FG_gyroid(
     h_min, h_max, fh, t_min, t_max, ft, size, k=1.0, center=ORIGIN, e=ease.linear
 ):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
 
     def f(p):
         Gh = _length(fh(p))
@@ -727,21 +1099,21 @@ def FG_gyroid(
         x = p[:, 0]
         y = p[:, 1]
         z = p[:, 2]
-        h = h_min + (h_max - h_min) * np.clip(Gh, 0, 1)
+        h = h_min + (h_max - h_min) * _xp.clip(Gh, 0, 1)
         h = e(h).reshape((-1, 1))
-        t = t_min + (t_max - t_min) * np.clip(Gt, 0, 1)
+        t = t_min + (t_max - t_min) * _xp.clip(Gt, 0, 1)
         t = e(t).reshape((-1, 1))
         d = (
-            np.abs(
-                np.cos(x) * np.sin(y)
-                + np.cos(y) * np.sin(z)
-                + np.cos(z) * np.sin(x)
+            _xp.abs(
+                _xp.cos(x) * _xp.sin(y)
+                + _xp.cos(y) * _xp.sin(z)
+                + _xp.cos(z) * _xp.sin(x)
                 - t
             )
             - h
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        q = _xp.abs(p - _cast(center, p)) - _cast(half, p)
+        return _max(d, _length(_max(q, 0)) + _min(_xp.amax(q, axis=1), 0))
 
     return f
 
@@ -759,25 +1131,28 @@ def FG_gyroid(
 
 @sdf3
 def graded_gyroid(h_min, h_max, t_min, t_max, size, center=ORIGIN):
-    size = np.array(size)
+    size = _xp.array(size)
+    half = size / 2
+    center = _xp.asarray(center)
+    sx, sy = float(size[0]), float(size[1])
 
     def f(p):
         x = p[:, 0]
         y = p[:, 1]
         z = p[:, 2]
-        h = h_min + (h_max - h_min) * (x + size[0] / 2) / size[0]
-        t = t_min + (t_max - t_min) * (y + size[1] / 2) / size[1]
+        h = h_min + (h_max - h_min) * (x + sx / 2) / sx
+        t = t_min + (t_max - t_min) * (y + sy / 2) / sy
         d = (
-            np.abs(
-                np.cos(x) * np.sin(y)
-                + np.cos(y) * np.sin(z)
-                + np.cos(z) * np.sin(x)
+            _xp.abs(
+                _xp.cos(x) * _xp.sin(y)
+                + _xp.cos(y) * _xp.sin(z)
+                + _xp.cos(z) * _xp.sin(x)
                 - t
             )
             - h
         )
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        q = _xp.abs(p - _cast(center, p)) - _cast(half, p)
+        return _max(d, _length(_max(q, 0)) + _min(_xp.amax(q, axis=1), 0))
 
     return f
 
@@ -785,15 +1160,16 @@ def graded_gyroid(h_min, h_max, t_min, t_max, size, center=ORIGIN):
 @sdf3
 # note -- careful with bounds on this one
 def scherkSecond(h, size, center=ORIGIN):
-    size = np.array(size)
+    half = _xp.array(size) / 2
+    center = _xp.asarray(center)
 
     def f(p):
         x = p[:, 0]
         y = p[:, 1]
         z = p[:, 2]
-        d = np.abs(np.sin(z) - np.sinh(x) * np.sinh(y)) - h
-        q = np.abs(p - center) - size / 2
-        return _max(d, _length(_max(q, 0)) + _min(np.amax(q, axis=1), 0))
+        d = _xp.abs(_xp.sin(z) - _xp.sinh(x) * _xp.sinh(y)) - h
+        q = _xp.abs(p - _cast(center, p)) - _cast(half, p)
+        return _max(d, _length(_max(q, 0)) + _min(_xp.amax(q, axis=1), 0))
 
     return f
 
@@ -807,7 +1183,7 @@ def tetrahedron(r):
         x = p[:, 0]
         y = p[:, 1]
         z = p[:, 2]
-        return (_max(np.abs(x + y) - z, np.abs(x - y) + z) - 1) / np.sqrt(3)
+        return (_max(_xp.abs(x + y) - z, _xp.abs(x - y) + z) - 1) / 3**0.5
 
     return f
 
@@ -815,20 +1191,21 @@ def tetrahedron(r):
 @sdf3
 def octahedron(r):
     def f(p):
-        return (np.sum(np.abs(p), axis=1) - r) * np.tan(np.radians(30))
+        return (_xp.sum(_xp.abs(p), axis=1) - r) * float(np.tan(np.radians(30)))
 
     return f
 
 
 @sdf3
 def dodecahedron(r):
-    x, y, z = _normalize(((1 + np.sqrt(5)) / 2, 1, 0))
+    x, y, z = _normalize(((1 + np.sqrt(5)) / 2, 1, 0)).tolist()
+    u, v, w = _xp.array(((x, y, z), (z, x, y), (y, z, x)))
 
     def f(p):
-        p = np.abs(p / r)
-        a = np.dot(p, (x, y, z))
-        b = np.dot(p, (z, x, y))
-        c = np.dot(p, (y, z, x))
+        p = _xp.abs(p / r)
+        a = _xp.dot(p, _cast(u, p))
+        b = _xp.dot(p, _cast(v, p))
+        c = _xp.dot(p, _cast(w, p))
         q = (_max(_max(a, b), c) - x) * r
         return q
 
@@ -838,15 +1215,16 @@ def dodecahedron(r):
 @sdf3
 def icosahedron(r):
     r *= 0.8506507174597755
-    x, y, z = _normalize(((np.sqrt(5) + 3) / 2, 1, 0))
-    w = np.sqrt(3) / 3
+    x, y, z = _normalize(((np.sqrt(5) + 3) / 2, 1, 0)).tolist()
+    w = 3**0.5 / 3
+    u, v, t, w = _xp.array(((x, y, z), (z, x, y), (y, z, x), (w, w, w)))
 
     def f(p):
-        p = np.abs(p / r)
-        a = np.dot(p, (x, y, z))
-        b = np.dot(p, (z, x, y))
-        c = np.dot(p, (y, z, x))
-        d = np.dot(p, (w, w, w)) - x
+        p = _xp.abs(p / r)
+        a = _xp.dot(p, _cast(u, p))
+        b = _xp.dot(p, _cast(v, p))
+        c = _xp.dot(p, _cast(t, p))
+        d = _xp.dot(p, _cast(w, p)) - x
         return _max(_max(_max(a, b), c) - x, d) * r
 
     return f
@@ -857,8 +1235,10 @@ def icosahedron(r):
 
 @op3
 def translate(other, offset):
+    offset = _xp.asarray(offset)
+
     def f(p):
-        return other(p - offset)
+        return other(p - _cast(offset, p))
 
     return f
 
@@ -869,11 +1249,11 @@ def scale(other, factor):
         x, y, z = factor
     except TypeError:
         x = y = z = factor
-    s = (x, y, z)
-    m = min(x, min(y, z))
+    s = _xp.array((x, y, z))
+    m = float(min(x, min(y, z)))
 
     def f(p):
-        return other(p / s) * m
+        return other(p / _cast(s, p)) * m
 
     return f
 
@@ -888,40 +1268,20 @@ def skin(other, depth):
 
 @op3
 def rotate(other, angle, vector=Z):
-    x, y, z = _normalize(vector)
-    s = np.sin(angle)
-    c = np.cos(angle)
-    m = 1 - c
-    matrix = np.array(
-        [
-            [m * x * x + c, m * x * y + z * s, m * z * x - y * s],
-            [m * x * y - z * s, m * y * y + c, m * y * z + x * s],
-            [m * z * x + y * s, m * y * z - x * s, m * z * z + c],
-        ]
-    ).T
+    matrix = _matrix(_rotation_matrix(angle, vector))
 
     def f(p):
-        return other(np.dot(p, matrix))
+        return other(p @ _cast(matrix, p))
 
     return f
 
 
 @op3
 def rotateD(other, angle, vector=Z):
-    x, y, z = _normalize(vector)
-    s = np.sin(angle * (180 / np.pi))
-    c = np.cos(angle * (180 / np.pi))
-    m = 1 - c
-    matrix = np.array(
-        [
-            [m * x * x + c, m * x * y + z * s, m * z * x - y * s],
-            [m * x * y - z * s, m * y * y + c, m * y * z + x * s],
-            [m * z * x + y * s, m * y * z - x * s, m * z * z + c],
-        ]
-    ).T
+    matrix = _matrix(_rotation_matrix(angle * (180 / np.pi), vector))
 
     def f(p):
-        return other(np.dot(p, matrix))
+        return other(p @ _cast(matrix, p))
 
     return f
 
@@ -936,8 +1296,8 @@ def rotate_to(other, a, b):
     if dot == -1:
         return rotate(other, np.pi, _perpendicular(a))
     angle = np.arccos(dot)
-    v = _normalize(np.cross(b, a))
-    return rotate(other, angle, v)
+    # rotate normalizes the axis
+    return rotate(other, angle, np.cross(b, a))
 
 
 @op3
@@ -947,97 +1307,20 @@ def orient(other, axis):
 
 @op3
 def mirror(other, axis=Z, center=ORIGIN):
-    a = _normalize(np.array(axis))
-    dot = np.dot(UP, a)
-    if (dot == 1) | (dot == -1):
-
-        def f(p):
-            return other(
-                np.dot(p - center, [[1, 0, 0], [0, 1, 0], [0, 0, -1]]) + center
-            )
-
-        return f
-    angle = np.arccos(dot)
-    x, y, z = _normalize(np.cross(UP, a))
-
-    # Rotate to the Z axis
-    s = np.sin(angle)
-    c = np.cos(angle)
-    m = 1 - c
-    matrix_a = np.array(
-        [
-            [m * x * x + c, m * x * y + z * s, m * z * x - y * s],
-            [m * x * y - z * s, m * y * y + c, m * y * z + x * s],
-            [m * z * x + y * s, m * y * z - x * s, m * z * z + c],
-        ]
-    ).T
-    # Do the flip
-    matrix_b = np.array([[1, 0, 0], [0, 1, 0], [0, 0, -1]]).T
-    # Rotate back
-    s = np.sin(-angle)
-    c = np.cos(-angle)
-    m = 1 - c
-    matrix_c = np.array(
-        [
-            [m * x * x + c, m * x * y + z * s, m * z * x - y * s],
-            [m * x * y - z * s, m * y * y + c, m * y * z + x * s],
-            [m * z * x + y * s, m * y * z - x * s, m * z * z + c],
-        ]
-    ).T
-    # Create the overall transformation matrix
-    matrix = np.matmul(np.matmul(matrix_a, matrix_b), matrix_c)
+    reflect = _reflection(axis, center)
 
     def f(p):
-        return other(np.dot(p - center, matrix) + center)
+        return other(reflect(p))
 
     return f
 
 
 @op3
 def mirror_copy(other, axis=Z, center=ORIGIN):
-    a = _normalize(np.array(axis))
-    dot = np.dot(UP, a)
-    if (dot == 1) | (dot == -1):
-
-        def f(p):
-            return _min(
-                other(np.dot(p - center, [[1, 0, 0], [0, 1, 0], [0, 0, -1]]) + center),
-                other(p),
-            )
-
-        return f
-    angle = np.arccos(dot)
-    x, y, z = _normalize(np.cross(UP, a))
-
-    # Rotate to the Z axis
-    s = np.sin(angle)
-    c = np.cos(angle)
-    m = 1 - c
-    matrix_a = np.array(
-        [
-            [m * x * x + c, m * x * y + z * s, m * z * x - y * s],
-            [m * x * y - z * s, m * y * y + c, m * y * z + x * s],
-            [m * z * x + y * s, m * y * z - x * s, m * z * z + c],
-        ]
-    ).T
-    # Do the flip
-    matrix_b = np.array([[1, 0, 0], [0, 1, 0], [0, 0, -1]]).T
-    # Rotate back
-    s = np.sin(-angle)
-    c = np.cos(-angle)
-    m = 1 - c
-    matrix_c = np.array(
-        [
-            [m * x * x + c, m * x * y + z * s, m * z * x - y * s],
-            [m * x * y - z * s, m * y * y + c, m * y * z + x * s],
-            [m * z * x + y * s, m * y * z - x * s, m * z * z + c],
-        ]
-    ).T
-    # Create the overall transformation matrix
-    matrix = np.matmul(np.matmul(matrix_a, matrix_b), matrix_c)
+    reflect = _reflection(axis, center)
 
     def f(p):
-        return _min(other(np.dot(p - center, matrix) + center), other(p))
+        return _min(other(reflect(p)), other(p))
 
     return f
 
@@ -1051,10 +1334,10 @@ def circular_array(other, count, offset=0):
         x = p[:, 0]
         y = p[:, 1]
         z = p[:, 2]
-        d = np.hypot(x, y)
-        a = np.arctan2(y, x) % da
-        d1 = other(_vec(np.cos(a - da) * d, np.sin(a - da) * d, z))
-        d2 = other(_vec(np.cos(a) * d, np.sin(a) * d, z))
+        d = _hypot(x, y)
+        a = _xp.arctan2(y, x) % da
+        d1 = other(_vec(_xp.cos(a - da) * d, _xp.sin(a - da) * d, z))
+        d2 = other(_vec(_xp.cos(a) * d, _xp.sin(a) * d, z))
         return _min(d1, d2)
 
     return f
@@ -1065,8 +1348,10 @@ def circular_array(other, count, offset=0):
 
 @op3
 def elongate(other, size):
+    size = _xp.asarray(size)
+
     def f(p):
-        q = np.abs(p) - size
+        q = _xp.abs(p) - _cast(size, p)
         x = q[:, 0].reshape((-1, 1))
         y = q[:, 1].reshape((-1, 1))
         z = q[:, 2].reshape((-1, 1))
@@ -1079,15 +1364,7 @@ def elongate(other, size):
 @op3
 def twist(other, k):
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        c = np.cos(k * z)
-        s = np.sin(k * z)
-        x2 = c * x - s * y
-        y2 = s * x + c * y
-        z2 = z
-        return other(_vec(x2, y2, z2))
+        return other(_rotate_xy(p, k * p[:, 2]))
 
     return f
 
@@ -1095,30 +1372,23 @@ def twist(other, k):
 @op3
 def bend(other, k):
     def f(p):
-        x = p[:, 0]
-        y = p[:, 1]
-        z = p[:, 2]
-        c = np.cos(k * x)
-        s = np.sin(k * x)
-        x2 = c * x - s * y
-        y2 = s * x + c * y
-        z2 = z
-        return other(_vec(x2, y2, z2))
+        return other(_rotate_xy(p, k * p[:, 0]))
 
     return f
 
 
 @op3
 def bend_linear(other, p0, p1, v, e=ease.linear):
-    p0 = np.array(p0)
-    p1 = np.array(p1)
-    v = -np.array(v)
+    p0 = _xp.array(p0)
+    p1 = _xp.array(p1)
+    v = -_xp.array(v)
     ab = p1 - p0
+    inv_abab = 1 / float(_xp.dot(ab, ab))
 
     def f(p):
-        t = np.clip(np.dot(p - p0, ab) / np.dot(ab, ab), 0, 1)
+        t = _xp.clip(_xp.dot(p - _cast(p0, p), _cast(ab, p)) * inv_abab, 0, 1)
         t = e(t).reshape((-1, 1))
-        return other(p + t * v)
+        return other(p + t * _cast(v, p))
 
     return f
 
@@ -1129,26 +1399,28 @@ def bend_radial(other, r0, r1, dz, e=ease.linear):
         x = p[:, 0]
         y = p[:, 1]
         z = p[:, 2]
-        r = np.hypot(x, y)
-        t = np.clip((r - r0) / (r1 - r0), 0, 1)
-        z = z - dz * e(t)
-        return other(_vec(x, y, z))
+        r = _hypot(x, y)
+        t = _xp.clip((r - r0) / (r1 - r0), 0, 1)
+        q = _vec(x, y, dz * e(t))
+        _xp.subtract(z, q[:, 2], out=q[:, 2])
+        return other(q)
 
     return f
 
 
 @op3
 def transition_linear(f0, f1, p0=-Z, p1=Z, e=ease.linear):
-    p0 = np.array(p0)
-    p1 = np.array(p1)
+    p0 = _xp.array(p0)
+    p1 = _xp.array(p1)
     ab = p1 - p0
+    inv_abab = 1 / float(_xp.dot(ab, ab))
 
     def f(p):
         d1 = f0(p)
         d2 = f1(p)
-        t = np.clip(np.dot(p - p0, ab) / np.dot(ab, ab), 0, 1)
+        t = _xp.clip(_xp.dot(p - _cast(p0, p), _cast(ab, p)) * inv_abab, 0, 1)
         t = e(t).reshape((-1, 1))
-        return t * d2 + (1 - t) * d1
+        return _lerp(d1, d2, t)
 
     return f
 
@@ -1159,9 +1431,9 @@ def transition_spherical(f0, f1, r0=5, x0=0, y0=0, z0=0, k=1.0, e=ease.linear):
         d1 = f0(p)
         d2 = f1(p)
         r = (p[:, 0] - x0) ** 2 + (p[:, 1] - y0) ** 2 + (p[:, 2] - z0) ** 2 - r0**2
-        t = 1.0 / (1.0 + np.exp(k * r))
+        t = 1.0 / (1.0 + _xp.exp(k * r))
         t = e(t).reshape((-1, 1))
-        return t * d2 + (1 - t) * d1
+        return _lerp(d1, d2, t)
 
     return f
 
@@ -1173,9 +1445,9 @@ def transition_sdf(f0, f1, f2, k=0.25, h=1.0, e=ease.linear):
         d2 = f1(p)
         d3 = f2(p)
         r = _length(d3 - h)
-        t = 1.0 / (1.0 + np.exp(k * r))
+        t = 1.0 / (1.0 + _xp.exp(k * r))
         t = e(t).reshape((-1, 1))
-        return t * d2 + (1 - t) * d1
+        return _lerp(d1, d2, t)
 
     return f
 
@@ -1185,10 +1457,10 @@ def transition_radial(f0, f1, r0=0, r1=1, e=ease.linear):
     def f(p):
         d1 = f0(p)
         d2 = f1(p)
-        r = np.hypot(p[:, 0], p[:, 1])
-        t = np.clip((r - r0) / (r1 - r0), 0, 1)
+        r = _hypot(p[:, 0], p[:, 1])
+        t = _xp.clip((r - r0) / (r1 - r0), 0, 1)
         t = e(t).reshape((-1, 1))
-        return t * d2 + (1 - t) * d1
+        return _lerp(d1, d2, t)
 
     return f
 
@@ -1199,9 +1471,9 @@ def transition_sigmoid(f0, f1, k=1.0, e=ease.linear):
         d1 = f0(p)
         d2 = f1(p)
         G = p[:, 2]
-        t = np.clip(1.0 / (1.0 + np.exp(k * G)), 0, 1)
+        t = _xp.clip(1.0 / (1.0 + _xp.exp(k * G)), 0, 1)
         t = e(t).reshape((-1, 1))
-        return t * d2 + (1 - t) * d1
+        return _lerp(d1, d2, t)
 
     return f
 
@@ -1212,9 +1484,9 @@ def transition_general(f0, f1, f2, k=1.0, e=ease.linear):
         d1 = f0(p)
         d2 = f1(p)
         G = f2(p)
-        t = np.clip(1.0 / (1.0 + np.exp(k * G)), 0, 1)
+        t = _xp.clip(1.0 / (1.0 + _xp.exp(k * G)), 0, 1)
         t = e(t).reshape((-1, 1))
-        return t * d2 + (1 - t) * d1
+        return _lerp(d1, d2, t)
 
     return f
 
@@ -1225,18 +1497,19 @@ def wrap_around(other, x0, x1, r=None, e=ease.linear):
     p1 = X * x1
     v = -Y
     if r is None:
-        r = np.linalg.norm(p1 - p0) / (2 * np.pi)
+        r = float(np.linalg.norm(p1 - p0)) / (2 * np.pi)
+    p0, p1, v = _xp.asarray(p0), _xp.asarray(p1), _xp.asarray(v)
 
     def f(p):
         x = p[:, 0]
         y = p[:, 1]
         z = p[:, 2]
-        d = np.hypot(x, y) - r
+        d = _hypot(x, y) - r
         d = d.reshape((-1, 1))
-        a = np.arctan2(y, x)
+        a = _xp.arctan2(y, x)
         t = (a + np.pi) / (2 * np.pi)
         t = e(t).reshape((-1, 1))
-        q = p0 + (p1 - p0) * t + v * d
+        q = _cast(p0, p) + _cast(p1 - p0, p) * t + _cast(v, p) * d
         q[:, 2] = z
         return other(q)
 
@@ -1255,7 +1528,7 @@ def slice(other):
     b = other.negate() & s
 
     def f(p):
-        p = _vec(p[:, 0], p[:, 1], np.zeros(len(p)))
+        p = _vec(p[:, 0], p[:, 1], 0)
         A = a(p).reshape(-1)
         B = -b(p).reshape(-1)
         w = A <= 0
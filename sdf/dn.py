@@ -1,53 +1,59 @@
 import itertools
 import numpy as np
 
-_min = np.minimum
-_max = np.maximum
+from . import kernels
+from .backend import xp
 
-def union(a, *bs, k=None):
+_min = xp.minimum
+_max = xp.maximum
+
+def _union(d1, d2, K):
+    if K is None:
+        return _min(d1, d2)
+    h = xp.clip(0.5 + 0.5 * (d2 - d1) / K, 0, 1)
+    m = d2 + (d1 - d2) * h
+    return m - K * h * (1 - h)
+
+def _difference(d1, d2, K):
+    if K is None:
+        return _max(d1, -d2)
+    h = xp.clip(0.5 - 0.5 * (d2 + d1) / K, 0, 1)
+    m = d1 + (-d2 - d1) * h
+    return m + K * h * (1 - h)
+
+def _intersection(d1, d2, K):
+    if K is None:
+        return _max(d1, d2)
+    h = xp.clip(0.5 - 0.5 * (d2 - d1) / K, 0, 1)
+    m = d2 + (d1 - d2) * h
+    return m + K * h * (1 - h)
+
+def _reduce(op, sa, sb, a, bs, k):
+    # combine a with each of bs in turn. With numba the operands are all
+    # evaluated first and combined in a single pass (see kernels.combine)
+    # instead of allocating new arrays for every step.
     def f(p):
         d1 = a(p)
-        for b in bs:
-            d2 = b(p)
-            K = k or getattr(b, '_k', None)
-            if K is None:
-                d1 = _min(d1, d2)
-            else:
-                h = np.clip(0.5 + 0.5 * (d2 - d1) / K, 0, 1)
-                m = d2 + (d1 - d2) * h
-                d1 = m - K * h * (1 - h)
+        ds = (b(p) for b in bs)
+        if kernels.ENABLED and bs:
+            ds = list(ds)
+            if all(isinstance(d, np.ndarray) and d.size == d1.size
+                    for d in [d1] + ds):
+                ks = [0] + [k or getattr(b, '_k', None) or 0 for b in bs]
+                return kernels.combine([d1] + ds, ks, sa, sb)
+        for b, d2 in zip(bs, ds):
+            d1 = op(d1, d2, k or getattr(b, '_k', None))
         return d1
     return f
 
+def union(a, *bs, k=None):
+    return _reduce(_union, -1, -1, a, bs, k)
+
 def difference(a, *bs, k=None):
-    def f(p):
-        d1 = a(p)
-        for b in bs:
-            d2 = b(p)
-            K = k or getattr(b, '_k', None)
-            if K is None:
-                d1 = _max(d1, -d2)
-            else:
-                h = np.clip(0.5 - 0.5 * (d2 + d1) / K, 0, 1)
-                m = d1 + (-d2 - d1) * h
-                d1 = m + K * h * (1 - h)
-        return d1
-    return f
+    return _reduce(_difference, 1, -1, a, bs, k)
 
 def intersection(a, *bs, k=None):
-    def f(p):
-        d1 = a(p)
-        for b in bs:
-            d2 = b(p)
-            K = k or getattr(b, '_k', None)
-            if K is None:
-                d1 = _max(d1, d2)
-            else:
-                h = np.clip(0.5 - 0.5 * (d2 - d1) / K, 0, 1)
-                m = d2 + (d1 - d2) * h
-                d1 = m + K * h * (1 - h)
-        return d1
-    return f
+    return _reduce(_intersection, 1, 1, a, bs, k)
 
 def blend(a, *bs, k=0.5):
     def f(p):
@@ -76,12 +82,12 @@ def erode(other, r):
 
 def shell(other, thickness):
     def f(p):
-        return np.abs(other(p)) - thickness / 2
+        return xp.abs(other(p)) - thickness / 2
     return f
 
 def repeat(other, spacing, count=None, padding=0):
-    count = np.array(count) if count is not None else None
-    spacing = np.array(spacing)
+    count = xp.array(count) if count is not None else None
+    spacing = xp.array(spacing)
 
     def neighbors(dim, padding, spacing):
         try:
@@ -99,14 +105,20 @@ def repeat(other, spacing, count=None, padding=0):
         return list(itertools.product(*axes))
 
     def f(p):
-        q = np.divide(p, spacing, out=np.zeros_like(p), where=spacing != 0)
+        # keep float32 points in float32
+        dtype = p.dtype if p.dtype.kind == 'f' else spacing.dtype
+        s = spacing.astype(dtype, copy=False)
+        nonzero = s != 0
+        q = xp.where(nonzero, p / xp.where(nonzero, s, 1), 0)
         if count is None:
-            index = np.round(q)
+            index = xp.round(q)
         else:
-            index = np.clip(np.round(q), -count, count)
+            c = count.astype(q.dtype)
+            index = xp.clip(xp.round(q), -c, c)
 
-        indexes = [index + n for n in neighbors(p.shape[-1], padding, spacing)]
-        A = [other(p - spacing * i) for i in indexes]
+        indexes = [index + xp.array(n, dtype=index.dtype)
+            for n in neighbors(p.shape[-1], padding, spacing)]
+        A = [other(p - s * i) for i in indexes]
         a = A[0]
         for b in A[1:]:
             a = _min(a, b)
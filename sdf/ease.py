@@ -67,17 +67,17 @@ def in_out_sine(t):
     return -0.5 * (np.cos(np.pi * t) - 1)
 
 def in_expo(t):
-    a = np.zeros(len(t))
+    a = np.zeros_like(t)
     b = 2 ** (10 * (t - 1))
     return np.where(t == 0, a, b)
 
 def out_expo(t):
-    a = np.zeros(len(t)) + 1
+    a = np.zeros_like(t) + 1
     b = 1 - 2 ** (-10 * t)
     return np.where(t == 1, a, b)
 
 def in_out_expo(t):
-    zero = np.zeros(len(t))
+    zero = np.zeros_like(t)
     one = zero + 1
     a = 0.5 * 2 ** (20 * t - 10)
     b = 1 - 0.5 * 2 ** (-20 * t + 10)
@@ -147,17 +147,17 @@ def in_out_bounce(t):
     return np.where(t < 0.5, a, b)
 
 def in_square(t):
-    a = np.zeros(len(t))
+    a = np.zeros_like(t)
     b = a + 1
     return np.where(t < 1, a, b)
 
 def out_square(t):
-    a = np.zeros(len(t))
+    a = np.zeros_like(t)
     b = a + 1
     return np.where(t > 0, b, a)
 
 def in_out_square(t):
-    a = np.zeros(len(t))
+    a = np.zeros_like(t)
     b = a + 1
     return np.where(t < 0.5, a, b)
 
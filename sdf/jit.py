@@ -0,0 +1,342 @@
+from math import atan2, cos, sin, sqrt
+
+import numpy as np
+import threading
+
+from . import d3, kernels
+
+# SDF3.compile turns a tree of the primitives and operations below into the
+# source of a single numba kernel, which takes each point through the whole
+# tree at once instead of allocating arrays for every step. Each handler
+# emits the statements for one node given the names of the variables that
+# hold the point, and returns the name of the variable holding the distance.
+# The values of the arguments are passed to the kernel in an array rather
+# than written into its source, so that trees of the same shape share a
+# kernel. Trees that use anything else, or whose source would be longer than
+# MAX_LINES, are not compiled.
+
+# compiling takes longer than linearly in the length of the source: about a
+# second at 100 lines and nine at 1000
+MAX_LINES = 1000
+
+class _Unsupported(Exception):
+    pass
+
+_HANDLERS = {}
+
+def _handles(op):
+    def decorator(f):
+        _HANDLERS[op] = f
+        return f
+    return decorator
+
+class _Source:
+    def __init__(self):
+        self.lines = []
+        self.count = 0
+        self.constants = []
+
+    def let(self, expr):
+        # mirror_copy and circular_array repeat their SDF, so stop as soon
+        # as the source is too long rather than after writing all of it
+        if len(self.lines) >= MAX_LINES:
+            raise _Unsupported
+        self.count += 1
+        name = 'v%d' % self.count
+        self.lines.append('%s = %s' % (name, expr))
+        return name
+
+    def float(self, v):
+        v = float(v)
+        if not np.isfinite(v):
+            raise _Unsupported
+        self.constants.append(v)
+        return 'c%d' % (len(self.constants) - 1)
+
+    def vec3(self, v):
+        return [self.float(x) for x in np.broadcast_to(np.asarray(v, dtype=float), 3)]
+
+    def point(self, x, y, z):
+        return self.let(x), self.let(y), self.let(z)
+
+    def sdf(self, s, x, y, z):
+        # SDFs that are made of another SDF (slab, orient, ...) compile to it
+        while isinstance(s.f, d3.SDF3):
+            s = s.f
+        node = getattr(s, '_node', None)
+        if node is None or node[0] not in _HANDLERS:
+            raise _Unsupported
+        op, args = node
+        return _HANDLERS[op](self, x, y, z, **args)
+
+_KERNEL = '''
+def kernel(p, c, out):
+    %s
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        %s
+        out[i] = %s
+'''
+
+_NAMES = dict(
+    atan2=atan2, cos=cos, sin=sin, sqrt=sqrt,
+    _corner=kernels._corner, _smooth_max=kernels._smooth_max,
+)
+
+# generated functions have no file to cache them in
+_OPTIONS = dict(kernels.OPTIONS, cache=False)
+
+# compiled kernels by source and dtype, so that SDFs of the same shape share
+# a kernel, and it is compiled once even when all of
+# mesh.generate's worker threads ask for it at the same time
+_KERNELS = {}
+_LOCK = threading.Lock()
+
+def _kernel(source, dtype):
+    key = (source, dtype)
+    kernel = _KERNELS.get(key)
+    if kernel is None:
+        with _LOCK:
+            kernel = _KERNELS.get(key)
+            if kernel is None:
+                names = dict(_NAMES)
+                exec(source, names)
+                # one any-layout kernel per dtype, rather than one for the
+                # row and one for the column-major points mesh.generate
+                # samples
+                t = dtype.name
+                signature = 'void(%s[:, :], float64[::1], %s[:])' % (t, t)
+                kernel = kernels.njit(signature, **_OPTIONS)(names['kernel'])
+                _KERNELS[key] = kernel
+    return kernel
+
+def compile(s):
+    # a function of the points equivalent to s, or None
+    if not kernels.ENABLED:
+        return None
+    source = _Source()
+    try:
+        d = source.sdf(s, 'x', 'y', 'z')
+    except (_Unsupported, RecursionError):
+        # trees too deep to walk are sampled as they are, like the ones the
+        # handlers don't support
+        return None
+    constants = np.array(source.constants, dtype=np.float64)
+    loads = ['c%d = c[%d]' % (i, i) for i in range(len(constants))]
+    source = _KERNEL % (
+        '\n    '.join(loads), '\n        '.join(source.lines), d)
+
+    def f(p):
+        p, out = kernels._prepare(p)
+        _kernel(source, p.dtype)(p, constants, out)
+        return out
+
+    return f
+
+# Primitives
+
+@_handles(d3.sphere)
+def _sphere(g, x, y, z, radius, center):
+    cx, cy, cz = g.vec3(center)
+    x, y, z = g.point('%s - %s' % (x, cx), '%s - %s' % (y, cy), '%s - %s' % (z, cz))
+    return g.let('sqrt(%s * %s + %s * %s + %s * %s) - %s' % (
+        x, x, y, y, z, z, g.float(radius)))
+
+@_handles(d3.plane)
+def _plane(g, x, y, z, normal, point):
+    nx, ny, nz = g.vec3(d3._normalize(np.asarray(normal, dtype=float)))
+    px, py, pz = g.vec3(point)
+    return g.let('(%s - %s) * %s + (%s - %s) * %s + (%s - %s) * %s' % (
+        px, x, nx, py, y, ny, pz, z, nz))
+
+@_handles(d3.slab)
+def _slab(g, x, y, z, x0, y0, z0, x1, y1, z1, k):
+    # a box with some of its faces at infinity: the axes without bounds
+    # drop out. Smooth slabs are made of planes and compile to those
+    qs = []
+    for v, v0, v1 in ((x, x0, x1), (y, y0, y1), (z, z0, z1)):
+        d = ['%s - %s' % (g.float(v0), v)] if v0 is not None else []
+        d += ['%s - %s' % (v, g.float(v1))] if v1 is not None else []
+        if d:
+            qs.append(g.let(d[0] if len(d) == 1 else 'max(%s, %s)' % tuple(d)))
+    if not qs:
+        raise _Unsupported
+    outside = ' + '.join('max(%s, 0.0) ** 2' % q for q in qs)
+    inside = qs[0]
+    for q in qs[1:]:
+        inside = 'max(%s, %s)' % (inside, q)
+    return g.let('sqrt(%s) + min(%s, 0.0)' % (outside, inside))
+
+def _corner(g, x, y, z, size, center, radius):
+    cx, cy, cz = g.vec3(center)
+    hx, hy, hz = g.vec3(np.asarray(size, dtype=float) / 2 - radius)
+    return g.let('_corner(abs(%s - %s) - %s, abs(%s - %s) - %s, abs(%s - %s) - %s) - %s' % (
+        x, cx, hx, y, cy, hy, z, cz, hz, g.float(radius)))
+
+@_handles(d3.box)
+def _box(g, x, y, z, size, center, a, b):
+    # a box given by its corners is made of a box given by its size
+    return _corner(g, x, y, z, size, center, 0)
+
+@_handles(d3.rounded_box)
+def _rounded_box(g, x, y, z, size, radius, center):
+    return _corner(g, x, y, z, size, center, radius)
+
+@_handles(d3.torus)
+def _torus(g, x, y, z, r1, r2):
+    a = g.let('sqrt(%s * %s + %s * %s) - %s' % (x, x, y, y, g.float(r1)))
+    return g.let('sqrt(%s * %s + %s * %s) - %s' % (a, a, z, z, g.float(r2)))
+
+@_handles(d3.cylinder)
+def _cylinder(g, x, y, z, radius):
+    return g.let('sqrt(%s * %s + %s * %s) - %s' % (x, x, y, y, g.float(radius)))
+
+@_handles(d3.capsule)
+def _capsule(g, x, y, z, a, b, radius):
+    a = np.asarray(a, dtype=float)
+    ba = np.asarray(b, dtype=float) - a
+    ax, ay, az = g.vec3(a)
+    bx, by, bz = g.vec3(ba)
+    x, y, z = g.point('%s - %s' % (x, ax), '%s - %s' % (y, ay), '%s - %s' % (z, az))
+    h = g.let('min(max((%s * %s + %s * %s + %s * %s) * %s, 0.0), 1.0)' % (
+        x, bx, y, by, z, bz, g.float(1 / np.dot(ba, ba))))
+    x, y, z = g.point(
+        '%s - %s * %s' % (x, bx, h), '%s - %s * %s' % (y, by, h),
+        '%s - %s * %s' % (z, bz, h))
+    return g.let('sqrt(%s * %s + %s * %s + %s * %s) - %s' % (
+        x, x, y, y, z, z, g.float(radius)))
+
+# Positioning
+
+def _transform(g, x, y, z, matrix, center=None):
+    # (p - center) @ matrix + center
+    m = [[g.float(v) for v in row] for row in matrix]
+    c = g.vec3(0 if center is None else center)
+    x, y, z = g.point('%s - %s' % (x, c[0]), '%s - %s' % (y, c[1]), '%s - %s' % (z, c[2]))
+    return g.point(*[
+        '%s * %s + %s * %s + %s * %s + %s' % (x, m[0][j], y, m[1][j], z, m[2][j], c[j])
+        for j in range(3)])
+
+@_handles(d3.translate)
+def _translate(g, x, y, z, other, offset):
+    ox, oy, oz = g.vec3(offset)
+    return g.sdf(other, *g.point(
+        '%s - %s' % (x, ox), '%s - %s' % (y, oy), '%s - %s' % (z, oz)))
+
+@_handles(d3.scale)
+def _scale(g, x, y, z, other, factor):
+    sx, sy, sz = np.broadcast_to(np.asarray(factor, dtype=float), 3)
+    d = g.sdf(other, *g.point(
+        '%s / %s' % (x, g.float(sx)), '%s / %s' % (y, g.float(sy)),
+        '%s / %s' % (z, g.float(sz))))
+    return g.let('%s * %s' % (d, g.float(min(sx, sy, sz))))
+
+@_handles(d3.rotate)
+def _rotate(g, x, y, z, other, angle, vector):
+    return g.sdf(other, *_transform(g, x, y, z, d3._rotation_matrix(angle, vector)))
+
+@_handles(d3.rotateD)
+def _rotateD(g, x, y, z, other, angle, vector):
+    matrix = d3._rotation_matrix(angle * (180 / np.pi), vector)
+    return g.sdf(other, *_transform(g, x, y, z, matrix))
+
+@_handles(d3.mirror)
+def _mirror(g, x, y, z, other, axis, center):
+    matrix = d3._mirror_matrix(axis)
+    return g.sdf(other, *_transform(g, x, y, z, matrix, center))
+
+@_handles(d3.mirror_copy)
+def _mirror_copy(g, x, y, z, other, axis, center):
+    matrix = d3._mirror_matrix(axis)
+    d1 = g.sdf(other, *_transform(g, x, y, z, matrix, center))
+    d2 = g.sdf(other, x, y, z)
+    return g.let('min(%s, %s)' % (d1, d2))
+
+@_handles(d3.circular_array)
+def _circular_array(g, x, y, z, other, count, offset):
+    da = g.float(2 * np.pi / count)
+    d = g.let('sqrt(%s * %s + %s * %s)' % (x, x, y, y))
+    a = g.let('atan2(%s, %s) %% %s' % (y, x, da))
+    ds = []
+    for b in ('%s - %s' % (a, da), a):
+        ds.append(g.sdf(other, *g.point(
+            'cos(%s) * %s - %s' % (b, d, g.float(offset)),
+            'sin(%s) * %s' % (b, d), z)))
+    return g.let('min(%s, %s)' % tuple(ds))
+
+# Alterations
+
+@_handles(d3.elongate)
+def _elongate(g, x, y, z, other, size):
+    sx, sy, sz = g.vec3(size)
+    q = g.point('abs(%s) - %s' % (x, sx), 'abs(%s) - %s' % (y, sy), 'abs(%s) - %s' % (z, sz))
+    w = g.let('min(max(%s, max(%s, %s)), 0.0)' % q)
+    d = g.sdf(other, *g.point(*['max(%s, 0.0)' % v for v in q]))
+    return g.let('%s + %s' % (d, w))
+
+def _rotate_xy(g, x, y, z, other, angle):
+    c = g.let('cos(%s)' % angle)
+    s = g.let('sin(%s)' % angle)
+    return g.sdf(other, *g.point(
+        '%s * %s - %s * %s' % (c, x, s, y), '%s * %s + %s * %s' % (s, x, c, y), z))
+
+@_handles(d3.twist)
+def _twist(g, x, y, z, other, k):
+    return _rotate_xy(g, x, y, z, other, '%s * %s' % (g.float(k), z))
+
+@_handles(d3.bend)
+def _bend(g, x, y, z, other, k):
+    return _rotate_xy(g, x, y, z, other, '%s * %s' % (g.float(k), x))
+
+@_handles(d3.skin)
+def _skin(g, x, y, z, other, depth):
+    return g.let('max(%s - %s, 0.0)' % (g.sdf(other, x, y, z), g.float(depth)))
+
+# Booleans
+
+def _reduce(g, x, y, z, sa, sb, a, bs, k):
+    # see kernels.combine
+    d = g.let('%r * %s' % (float(sa), g.sdf(a, x, y, z)))
+    for b in bs:
+        K = k or getattr(b, '_k', None) or 0
+        d = g.let('_smooth_max(%s, %r * %s, %s)' % (
+            d, float(sb), g.sdf(b, x, y, z), g.float(K)))
+    return g.let('%r * %s' % (float(sa), d))
+
+@_handles(d3.union)
+def _union(g, x, y, z, a, bs, k):
+    return _reduce(g, x, y, z, -1, -1, a, bs, k)
+
+@_handles(d3.difference)
+def _difference(g, x, y, z, a, bs, k):
+    return _reduce(g, x, y, z, 1, -1, a, bs, k)
+
+@_handles(d3.intersection)
+def _intersection(g, x, y, z, a, bs, k):
+    return _reduce(g, x, y, z, 1, 1, a, bs, k)
+
+@_handles(d3.blend)
+def _blend(g, x, y, z, a, bs, k):
+    d = g.sdf(a, x, y, z)
+    for b in bs:
+        K = g.float(k or getattr(b, '_k', None))
+        d = g.let('%s * %s + (1 - %s) * %s' % (K, g.sdf(b, x, y, z), K, d))
+    return d
+
+@_handles(d3.negate)
+def _negate(g, x, y, z, other):
+    return g.let('-%s' % g.sdf(other, x, y, z))
+
+@_handles(d3.dilate)
+def _dilate(g, x, y, z, other, r):
+    return g.let('%s - %s' % (g.sdf(other, x, y, z), g.float(r)))
+
+@_handles(d3.erode)
+def _erode(g, x, y, z, other, r):
+    return g.let('%s + %s' % (g.sdf(other, x, y, z), g.float(r)))
+
+@_handles(d3.shell)
+def _shell(g, x, y, z, other, thickness):
+    return g.let('abs(%s) - %s' % (g.sdf(other, x, y, z), g.float(thickness / 2)))
@@ -0,0 +1,376 @@
+from math import cos, sin, sqrt
+
+import numpy as np
+
+from .backend import xp
+
+# Numba is optional. Without it (or when evaluating with a GPU backend)
+# ENABLED is False and the primitives in d3 use their array implementations
+# instead. Without numba the decorators below are no-ops.
+
+try:
+    from numba import njit
+    ENABLED = xp is np
+except ImportError:
+    ENABLED = False
+
+    def njit(*args, **kwargs):
+        def decorator(f):
+            return f
+        return decorator
+
+# Kernels release the GIL rather than running their own thread pool, so the
+# batches sampled by mesh.generate's worker threads run on all cores.
+# Division by zero gives inf or nan as it does with numpy arrays.
+OPTIONS = dict(nogil=True, fastmath=True, cache=True, error_model='numpy')
+
+# Helpers
+
+def _prepare(p):
+    p = np.asarray(p)
+    if p.dtype.kind != 'f':
+        p = p.astype(np.float64)
+    return p, np.empty(len(p), dtype=p.dtype)
+
+def _vec3(v, dtype):
+    return np.ascontiguousarray(np.broadcast_to(v, 3), dtype=dtype)
+
+@njit(**OPTIONS)
+def _corner(qx, qy, qz):
+    mx = max(qx, 0.0)
+    my = max(qy, 0.0)
+    mz = max(qz, 0.0)
+    return sqrt(mx * mx + my * my + mz * mz) + min(max(qx, max(qy, qz)), 0.0)
+
+@njit(**OPTIONS)
+def _clip(x, y, z, c, h):
+    return _corner(abs(x - c[0]) - h[0], abs(y - c[1]) - h[1], abs(z - c[2]) - h[2])
+
+@njit(**OPTIONS)
+def _sign(x):
+    return 1.0 if x > 0 else -1.0 if x < 0 else 0.0
+
+# Primitives
+
+@njit(**OPTIONS)
+def _box(p, c, h, radius, out):
+    for i in range(p.shape[0]):
+        out[i] = _clip(p[i, 0], p[i, 1], p[i, 2], c, h) - radius
+
+@njit(**OPTIONS)
+def _slab(p, lo, hi, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        out[i] = _corner(
+            max(lo[0] - x, x - hi[0]), max(lo[1] - y, y - hi[1]),
+            max(lo[2] - z, z - hi[2]))
+
+@njit(**OPTIONS)
+def _wireframe_box(p, c, h, t, out):
+    for i in range(p.shape[0]):
+        px = abs(p[i, 0] - c[0]) - h[0]
+        py = abs(p[i, 1] - c[1]) - h[1]
+        pz = abs(p[i, 2] - c[2]) - h[2]
+        qx = abs(px + t) - t
+        qy = abs(py + t) - t
+        qz = abs(pz + t) - t
+        out[i] = min(
+            _corner(px, qy, qz), min(_corner(qx, py, qz), _corner(qx, qy, pz))
+        )
+
+@njit(**OPTIONS)
+def _capped_cylinder(p, a, ba, radius, out):
+    baba = ba[0] * ba[0] + ba[1] * ba[1] + ba[2] * ba[2]
+    inv_baba = 1 / baba
+    for i in range(p.shape[0]):
+        pax = p[i, 0] - a[0]
+        pay = p[i, 1] - a[1]
+        paz = p[i, 2] - a[2]
+        paba = pax * ba[0] + pay * ba[1] + paz * ba[2]
+        qx = pax * baba - ba[0] * paba
+        qy = pay * baba - ba[1] * paba
+        qz = paz * baba - ba[2] * paba
+        x = sqrt(qx * qx + qy * qy + qz * qz) - radius * baba
+        y = abs(paba - baba * 0.5) - baba * 0.5
+        x2 = x * x
+        y2 = y * y * baba
+        if max(x, y) < 0:
+            d = -min(x2, y2)
+        else:
+            d = (x2 if x > 0 else 0.0) + (y2 if y > 0 else 0.0)
+        out[i] = _sign(d) * sqrt(abs(d)) * inv_baba
+
+@njit(**OPTIONS)
+def _capped_cone(p, a, ba, ra, rb, out):
+    rba = rb - ra
+    baba = ba[0] * ba[0] + ba[1] * ba[1] + ba[2] * ba[2]
+    inv_baba = 1 / baba
+    inv_k = 1 / (rba * rba + baba)
+    for i in range(p.shape[0]):
+        pax = p[i, 0] - a[0]
+        pay = p[i, 1] - a[1]
+        paz = p[i, 2] - a[2]
+        papa = pax * pax + pay * pay + paz * paz
+        paba = (pax * ba[0] + pay * ba[1] + paz * ba[2]) * inv_baba
+        x = sqrt(papa - paba * paba * baba)
+        cax = max(0.0, x - (ra if paba < 0.5 else rb))
+        cay = abs(paba - 0.5) - 0.5
+        f = min(max((rba * (x - ra) + paba * baba) * inv_k, 0.0), 1.0)
+        cbx = x - ra - f * rba
+        cby = paba - f
+        s = -1.0 if cbx < 0 and cay < 0 else 1.0
+        out[i] = s * sqrt(
+            min(cax * cax + cay * cay * baba, cbx * cbx + cby * cby * baba)
+        )
+
+@njit(**OPTIONS)
+def _rounded_cone(p, r1, r2, h, out):
+    b = (r1 - r2) / h
+    a = sqrt(1 - b * b)
+    for i in range(p.shape[0]):
+        qx = sqrt(p[i, 0] * p[i, 0] + p[i, 1] * p[i, 1])
+        qy = p[i, 2]
+        k = -b * qx + a * qy
+        if k < 0:
+            out[i] = sqrt(qx * qx + qy * qy) - r1
+        elif k > a * h:
+            out[i] = sqrt(qx * qx + (qy - h) * (qy - h)) - r2
+        else:
+            out[i] = a * qx + b * qy - r1
+
+@njit(**OPTIONS)
+def _ellipsoid(p, inv, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0] * inv[0]
+        y = p[i, 1] * inv[1]
+        z = p[i, 2] * inv[2]
+        k0 = sqrt(x * x + y * y + z * z)
+        x = x * inv[0]
+        y = y * inv[1]
+        z = z * inv[2]
+        k1 = sqrt(x * x + y * y + z * z)
+        out[i] = k0 * (k0 - 1) / k1
+
+@njit(**OPTIONS)
+def _pyramid(p, h, out):
+    m2 = h * h + 0.25
+    for i in range(p.shape[0]):
+        px = abs(p[i, 0]) - 0.5
+        pz = abs(p[i, 1]) - 0.5
+        if pz > px:
+            px, pz = pz, px
+        py = p[i, 2]
+        qx = pz
+        qy = h * py - 0.5 * px
+        qz = h * px + 0.5 * py
+        s = max(-qx, 0.0)
+        t = min(max((qy - 0.5 * pz) / (m2 + 0.25), 0.0), 1.0)
+        a = m2 * (qx + s) ** 2 + qy * qy
+        b = m2 * (qx + 0.5 * t) ** 2 + (qy - m2 * t) ** 2
+        d2 = 0.0 if min(qy, -qx * m2 - qy * 0.5) > 0 else min(a, b)
+        out[i] = sqrt((d2 + qz * qz) / m2) * _sign(max(qz, -py))
+
+def box(p, half, center, radius=0):
+    # half is half the size of the box that is rounded by radius
+    p, out = _prepare(p)
+    t = p.dtype.type
+    _box(p, _vec3(center, t), _vec3(half, t), t(radius), out)
+    return out
+
+def slab(p, lo, hi):
+    # fastmath assumes there are no infinities, so the missing bounds are
+    # the largest finite value instead
+    p, out = _prepare(p)
+    m = np.finfo(p.dtype).max
+    _slab(p, _vec3(np.clip(lo, -m, m), p.dtype), _vec3(np.clip(hi, -m, m), p.dtype), out)
+    return out
+
+def wireframe_box(p, half, thickness, center):
+    # half is half the size of the box plus half the thickness
+    p, out = _prepare(p)
+    t = p.dtype.type(thickness / 2)
+    _wireframe_box(p, _vec3(center, p.dtype), _vec3(half, p.dtype), t, out)
+    return out
+
+def capped_cylinder(p, a, ba, radius):
+    p, out = _prepare(p)
+    t = p.dtype.type
+    _capped_cylinder(p, _vec3(a, t), _vec3(ba, t), t(radius), out)
+    return out
+
+def capped_cone(p, a, ba, ra, rb):
+    p, out = _prepare(p)
+    t = p.dtype.type
+    _capped_cone(p, _vec3(a, t), _vec3(ba, t), t(ra), t(rb), out)
+    return out
+
+def rounded_cone(p, r1, r2, h):
+    p, out = _prepare(p)
+    t = p.dtype.type
+    _rounded_cone(p, t(r1), t(r2), t(h), out)
+    return out
+
+def ellipsoid(p, inv):
+    # inv is the reciprocal of the size
+    p, out = _prepare(p)
+    _ellipsoid(p, _vec3(inv, p.dtype), out)
+    return out
+
+def pyramid(p, h):
+    p, out = _prepare(p)
+    _pyramid(p, p.dtype.type(h), out)
+    return out
+
+# Minimal surfaces
+
+@njit(**OPTIONS)
+def _schwarzP(p, thickness, topology, c, h, dmax, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        b = _clip(x, y, z, c, h)
+        if b >= dmax:
+            out[i] = b
+            continue
+        d = abs(cos(x) + cos(y) + cos(z) - topology) - thickness
+        out[i] = max(d, b)
+
+@njit(**OPTIONS)
+def _schwarzD(p, thickness, topology, c, h, dmax, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        b = _clip(x, y, z, c, h)
+        if b >= dmax:
+            out[i] = b
+            continue
+        sx, cx = sin(x), cos(x)
+        sy, cy = sin(y), cos(y)
+        sz, cz = sin(z), cos(z)
+        d = abs(sx * sy * sz + sx * cy * cz + cx * sy * cz - topology) - thickness
+        out[i] = max(d, b)
+
+@njit(**OPTIONS)
+def _fischer_koch(p, thickness, topology, c, h, dmax, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        b = _clip(x, y, z, c, h)
+        if b >= dmax:
+            out[i] = b
+            continue
+        sx, cx = sin(x), cos(x)
+        sy, cy = sin(y), cos(y)
+        sz, cz = sin(z), cos(z)
+        c2x, c2y, c2z = cx * cx - sx * sx, cy * cy - sy * sy, cz * cz - sz * sz
+        d = abs(c2x * sy * cz + c2y * cx * sz + cy * sx * c2z - topology) - thickness
+        out[i] = max(d, b)
+
+@njit(**OPTIONS)
+def _lidinoid(p, thickness, topology, c, h, dmax, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        b = _clip(x, y, z, c, h)
+        if b >= dmax:
+            out[i] = b
+            continue
+        sx, cx = sin(x), cos(x)
+        sy, cy = sin(y), cos(y)
+        sz, cz = sin(z), cos(z)
+        c2x, c2y, c2z = cx * cx - sx * sx, cy * cy - sy * sy, cz * cz - sz * sz
+        d = abs(
+            2 * sx * cx * cy * sz
+            + 2 * sy * cy * cz * sx
+            + 2 * sz * cz * cx * sy
+            - c2x * c2y
+            - c2y * c2z
+            - c2z * c2x
+            - topology
+        ) - thickness
+        out[i] = max(d, b)
+
+@njit(**OPTIONS)
+def _neovius(p, thickness, topology, c, h, dmax, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        b = _clip(x, y, z, c, h)
+        if b >= dmax:
+            out[i] = b
+            continue
+        cx, cy, cz = cos(x), cos(y), cos(z)
+        d = abs(3 * (cx + cy + cz) + 4 * cx * cy * cz - topology) - thickness
+        out[i] = max(d, b)
+
+@njit(**OPTIONS)
+def _gyroid(p, thickness, topology, c, h, dmax, out):
+    for i in range(p.shape[0]):
+        x = p[i, 0]
+        y = p[i, 1]
+        z = p[i, 2]
+        b = _clip(x, y, z, c, h)
+        if b >= dmax:
+            out[i] = b
+            continue
+        d = abs(
+            cos(x) * sin(y) + cos(y) * sin(z) + cos(z) * sin(x) - topology
+        ) - thickness
+        out[i] = max(d, b)
+
+def _surface(kernel, bound):
+    # bound is the largest absolute value of the surface's trigonometric
+    # sum: wherever the box term exceeds the largest possible surface
+    # term, it is the result and the sum is not evaluated
+    def f(p, thickness, topology, half, center):
+        p, out = _prepare(p)
+        t = p.dtype.type
+        dmax = t(bound + abs(topology) - thickness)
+        kernel(p, t(thickness), t(topology),
+            _vec3(center, t), _vec3(half, t), dmax, out)
+        return out
+    f.__name__ = kernel.__name__[1:]
+    return f
+
+schwarzP = _surface(_schwarzP, 3)
+schwarzD = _surface(_schwarzD, 3)
+fischer_koch = _surface(_fischer_koch, 3)
+lidinoid = _surface(_lidinoid, 6)
+neovius = _surface(_neovius, 13)
+gyroid = _surface(_gyroid, 3)
+
+# Operations
+
+@njit(**OPTIONS)
+def _smooth_max(a, b, k):
+    if k == 0:
+        return max(a, b)
+    h = min(max(0.5 - 0.5 * (b - a) / k, 0.0), 1.0)
+    return b + (a - b) * h + k * h * (1 - h)
+
+@njit(**OPTIONS)
+def _combine(ds, ks, sa, sb, out):
+    for i in range(out.shape[0]):
+        d = sa * ds[0][i]
+        for j in range(1, len(ds)):
+            d = _smooth_max(d, sb * ds[j][i], ks[j])
+        out[i] = sa * d
+
+def combine(ds, ks, sa, sb):
+    # sa times the smooth maximum of sa * ds[0] and sb * ds[1:], with hard
+    # operands given as k = 0: sa = sb = -1 is a union, sa = sb = 1 an
+    # intersection and sa = 1, sb = -1 a difference
+    dtype = np.result_type(*ds, np.float32)
+    shape = np.shape(ds[0])
+    ds = tuple(np.ascontiguousarray(np.ravel(d), dtype=dtype) for d in ds)
+    out = np.empty(len(ds[0]), dtype=dtype)
+    t = dtype.type
+    _combine(ds, np.array(ks, dtype=dtype), t(sa), t(sb), out)
+    return out.reshape(shape)
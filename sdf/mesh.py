@@ -7,7 +7,7 @@ import itertools
 import numpy as np
 import time
 
-from . import progress, stl, step
+from . import backend, progress, stl, step
 from . import simplify as simp
 
 WORKERS = multiprocessing.cpu_count()
@@ -18,15 +18,22 @@ def _marching_cubes(volume, level=0):
     verts, faces, _, _ = measure.marching_cubes(volume, level)
     return verts[faces].reshape((-1, 3))
 
-def _cartesian_product(*arrays):
+def _sample(sdf, P):
+    # evaluate on the configured backend and return the result as numpy
+    return backend.asnumpy(sdf(backend.xp.asarray(P)))
+
+def _cartesian_product(*arrays, dtype=None):
+    # points are stored one coordinate after another, so that each column
+    # of the returned (N, la) array is contiguous in memory
     la = len(arrays)
-    dtype = np.result_type(*arrays)
-    arr = np.empty([len(a) for a in arrays] + [la], dtype=dtype)
+    if dtype is None:
+        dtype = np.result_type(*arrays)
+    arr = np.empty([la] + [len(a) for a in arrays], dtype=dtype)
     for i, a in enumerate(np.ix_(*arrays)):
-        arr[...,i] = a
-    return arr.reshape(-1, la)
+        arr[i] = a
+    return arr.reshape(la, -1).T
 
-def _skip(sdf, job):
+def _skip(sdf, job, dtype=None):
     X, Y, Z = job
     x0, x1 = X[0], X[-1]
     y0, y1 = Y[0], Y[-1]
@@ -34,22 +41,23 @@ def _skip(sdf, job):
     x = (x0 + x1) / 2
     y = (y0 + y1) / 2
     z = (z0 + z1) / 2
-    r = abs(sdf(np.array([(x, y, z)])).reshape(-1)[0])
+    r = abs(_sample(sdf, np.array([(x, y, z)], dtype=dtype)).reshape(-1)[0])
     d = np.linalg.norm(np.array((x-x0, y-y0, z-z0)))
     if r <= d:
         return False
-    corners = np.array(list(itertools.product((x0, x1), (y0, y1), (z0, z1))))
-    values = sdf(corners).reshape(-1)
+    corners = np.array(
+        list(itertools.product((x0, x1), (y0, y1), (z0, z1))), dtype=dtype)
+    values = _sample(sdf, corners).reshape(-1)
     same = np.all(values > 0) if values[0] > 0 else np.all(values < 0)
     return same
 
-def _worker(sdf, job, sparse):
+def _worker(sdf, job, sparse, dtype=None):
     X, Y, Z = job
-    if sparse and _skip(sdf, job):
+    if sparse and _skip(sdf, job, dtype):
         return None
         # return _debug_triangles(X, Y, Z)
-    P = _cartesian_product(X, Y, Z)
-    volume = sdf(P).reshape((len(X), len(Y), len(Z)))
+    P = _cartesian_product(X, Y, Z, dtype=dtype)
+    volume = _sample(sdf, P).reshape((len(X), len(Y), len(Z)))
     try:
         points = _marching_cubes(volume)
     except Exception:
@@ -59,7 +67,7 @@ def _worker(sdf, job, sparse):
     offset = np.array([X[0], Y[0], Z[0]])
     return points * scale + offset
 
-def _estimate_bounds(sdf):
+def _estimate_bounds(sdf, dtype=None):
     # TODO: raise exception if bound estimation fails
     s = 16
     x0 = y0 = z0 = -1e9
@@ -74,9 +82,12 @@ def _estimate_bounds(sdf):
         if threshold == prev:
             break
         prev = threshold
-        P = _cartesian_product(X, Y, Z)
-        volume = sdf(P).reshape((len(X), len(Y), len(Z)))
-        where = np.argwhere(np.abs(volume) <= threshold)
+        P = _cartesian_product(X, Y, Z, dtype=dtype)
+        volume = _sample(sdf, P).reshape((len(X), len(Y), len(Z)))
+        # the first grids have points at exactly the threshold distance, which
+        # single precision samples may round to just beyond it
+        slack = 1 + 4 * np.finfo(volume.dtype).eps
+        where = np.argwhere(np.abs(volume) <= threshold * slack)
         x1, y1, z1 = (x0, y0, z0) + where.max(axis=0) * d + d / 2
         x0, y0, z0 = (x0, y0, z0) + where.min(axis=0) * d - d / 2
     return ((x0, y0, z0), (x1, y1, z1))
@@ -85,14 +96,18 @@ def generate(
         sdf,
         step=None, bounds=None, samples=SAMPLES,
         workers=WORKERS, batch_size=BATCH_SIZE,
-        verbose=True, sparse=True,
+        verbose=True, sparse=True, dtype=np.float32, compile=True,
         simplify=False, simp_ratio=0.5, simp_agressive=7,
         simp_add_random=None, simp_smooth=False, simp_cut=False):
 
     start = time.time()
 
+    # sample the whole tree with a single numba kernel where it can be
+    if compile and hasattr(sdf, 'compile'):
+        sdf = sdf.compile()
+
     if bounds is None:
-        bounds = _estimate_bounds(sdf)
+        bounds = _estimate_bounds(sdf, dtype)
     (x0, y0, z0), (x1, y1, z1) = bounds
 
     if step is None and samples is not None:
@@ -131,7 +146,7 @@ def generate(
     skipped = empty = nonempty = 0
     bar = progress.Bar(num_batches, enabled=verbose)
     pool = ThreadPool(workers)
-    f = partial(_worker, sdf, sparse=sparse)
+    f = partial(_worker, sdf, sparse=sparse, dtype=dtype)
     for result in pool.imap(f, batches):
         bar.increment(1)
         if result is None:
@@ -256,7 +271,7 @@ def sample_slice(
         raise Exception('x, y, or z position must be specified')
 
     P = _cartesian_product(X, Y, Z)
-    return sdf(P).reshape((w, h)), extent, axes
+    return _sample(sdf, P).reshape((w, h)), extent, axes
 
 def show_slice(*args, **kwargs):
     import matplotlib.pyplot as plt
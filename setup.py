@@ -15,6 +15,9 @@ setup(
         'scipy',
         'Pillow',
     ],
+    extras_require={
+        'fast': ['numba', 'numexpr'],
+    },
     license='MIT',
     classifiers=(
         'Development Status :: 3 - Alpha',